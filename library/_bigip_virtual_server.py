@@ -50,8 +50,7 @@ options:
     default: Common
   name:
     description:
-      - Virtual server name.
-    required: True
+      - Virtual server name. One of C(name) or C(virtual_servers) is required.
     aliases:
       - vs
   destination:
@@ -110,6 +109,13 @@ options:
   description:
     description:
       - Virtual server description.
+  virtual_servers:
+    description:
+      - List of virtual servers to manage in one task, instead of a single
+        C(name). Each item takes the same options as this module, and any
+        option an item does not set falls back to the value given to the
+        module. The virtual servers are reconciled concurrently.
+      - Mutually exclusive with C(name).
 extends_documentation_fragment: f5
 '''
 
@@ -145,6 +151,24 @@ EXAMPLES = r'''
     port: 8080
   delegate_to: localhost
 
+- name: Add several virtual servers at once
+  bigip_virtual_server:
+    server: lb.mydomain.net
+    user: admin
+    password: secret
+    state: present
+    partition: MyPartition
+    virtual_servers:
+      - name: web
+        destination: 10.10.10.10
+        port: 80
+        pool: web_pool
+      - name: api
+        destination: 10.10.10.11
+        port: 443
+        pool: api_pool
+  delegate_to: localhost
+
 - name: Delete virtual server
   bigip_virtual_server:
     server: lb.mydomain.net
@@ -163,6 +187,11 @@ deleted:
   returned: changed
   type: string
   sample: my-virtual-server
+results:
+  description: Result of each virtual server, when C(virtual_servers) is used
+  returned: when virtual_servers is used
+  type: list
+  sample: [{"name": "web", "changed": true}, {"name": "api", "changed": false, "failed": true, "msg": "..."}]
 '''
 
 # map of state values
@@ -177,6 +206,40 @@ STATUSES = {
     'offline': 'SESSION_STATUS_FORCED_DISABLED'
 }
 
+PROFILE_CONTEXT_ALL = 'PROFILE_CONTEXT_TYPE_ALL'
+
+# Profiles given to a virtual server created without any
+DEFAULT_PROFILES = (
+    {'profile_context': PROFILE_CONTEXT_ALL, 'profile_name': 'tcp'},
+)
+
+# Only host destinations are supported
+HOST_WILDMASKS = ('255.255.255.255',)
+
+# Options of the module that describe a single virtual server. These are the
+# keys accepted in each entry of virtual_servers.
+VIRTUAL_SERVER_ARGS = (
+    'state', 'partition', 'name', 'destination', 'port', 'all_policies',
+    'all_profiles', 'all_rules', 'enabled_vlans', 'pool', 'description', 'snat',
+    'route_advertisement_state', 'default_persistence_profile',
+    'fallback_persistence_profile'
+)
+
+# Most virtual servers reconciled at the same time by virtual_servers
+BATCH_WORKERS = 10
+
+# Where suds caches the WSDLs it downloads, so that later runs, and the
+# clients of the batch workers, do not download and parse them again
+WSDL_CACHE_DIR = '~/.ansible/bigsuds'
+
+# The iControl interfaces this module talks to
+INTERFACES = ('LocalLB.VirtualServer', 'LocalLB.VirtualAddressV2', 'System.Session')
+
+
+import sys
+import threading
+
+from multiprocessing.pool import ThreadPool
 
 try:
     import bigsuds
@@ -187,9 +250,11 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.f5_utils import F5ModuleError
 from ansible.module_utils.f5_utils import bigip_api
 from ansible.module_utils.f5_utils import bigsuds_found
+from ansible.module_utils.f5_utils import check_list_item
 from ansible.module_utils.f5_utils import f5_argument_spec
-from ansible.module_utils.f5_utils import fq_list_names
+from ansible.module_utils.f5_utils import fq_list_names_multi
 from ansible.module_utils.f5_utils import fq_name
+from ansible.module_utils.six import reraise
 
 def vs_exists(api, vs):
     # hack to determine if pool exists
@@ -208,16 +273,9 @@ def vs_exists(api, vs):
 
 def vs_create(api, name, destination, port, pool, profiles):
     if profiles:
-        _profiles = []
-        for profile in profiles:
-            _profiles.append(
-                dict(
-                    profile_context='PROFILE_CONTEXT_TYPE_ALL',
-                    profile_name=profile
-                )
-            )
+        _profiles = [{'profile_context': PROFILE_CONTEXT_ALL, 'profile_name': x} for x in profiles]
     else:
-        _profiles = [{'profile_context': 'PROFILE_CONTEXT_TYPE_ALL', 'profile_name': 'tcp'}]
+        _profiles = list(DEFAULT_PROFILES)
 
     # a bit of a hack to handle concurrent runs of this module.
     # even though we've checked the vs doesn't exist,
@@ -227,7 +285,7 @@ def vs_create(api, name, destination, port, pool, profiles):
     try:
         api.LocalLB.VirtualServer.create(
             definitions=[{'name': [name], 'address': [destination], 'port': port, 'protocol': 'PROTOCOL_TCP'}],
-            wildmasks=['255.255.255.255'],
+            wildmasks=list(HOST_WILDMASKS),
             resources=[{'type': 'RESOURCE_TYPE_POOL', 'default_pool_name': pool}],
             profiles=[_profiles])
         created = True
@@ -242,42 +300,119 @@ def vs_remove(api, name):
     )
 
 
+# Current settings of virtual servers, keyed by their full name. Filled once
+# per virtual server by get_current_state() and then only read in-process.
+# A value of None records that the virtual server does not exist.
+_VS_STATES = {}
+
+
+class VSState(object):
+    # The current settings of one virtual server. A setting that was not
+    # given when the state was made is read from the device the first time
+    # it is used, and then kept, so settings a task does not manage cost no
+    # round trip. See VS_STATE_READERS for how each one is read.
+    def __init__(self, api=None, name=None, **settings):
+        self._api = api
+        self._name = name
+        self.__dict__.update(settings)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_') or attr not in VS_STATE_READERS:
+            raise AttributeError(attr)
+        value = VS_STATE_READERS[attr](self)
+        setattr(self, attr, value)
+        return value
+
+
+# Returns the state of a virtual server, or None if it does not exist.
+#
+# Only the destination is read here, as the existence check. iControl SOAP
+# cannot carry different methods in one request, so the other settings are
+# read one call each, and only if a set_* function compares against them.
+def fetch_current_state(api, name):
+    try:
+        destination = get_destination(api, name)
+    except bigsuds.OperationFailed as e:
+        if "was not found" in str(e):
+            return None
+        raise
+    return VSState(
+        api, name,
+        destination=destination,
+
+        # The virtual address that route_advertisement_state is read from
+        address=destination['address']
+    )
+
+
+def get_current_state(api, name):
+    if name not in _VS_STATES:
+        _VS_STATES[name] = fetch_current_state(api, name)
+    return _VS_STATES[name]
+
+
+def created_state(name, destination, port, pool, profiles):
+    # The settings BIG-IP gives a virtual server made by vs_create(), so that
+    # they do not need to be read back.
+    if profiles:
+        profiles = [dict(profile_name=x) for x in profiles]
+    else:
+        profiles = list(DEFAULT_PROFILES)
+    _VS_STATES[name] = VSState(
+        rules=[],
+        profiles=profiles,
+        policies=[],
+        vlan={'state': 'STATE_DISABLED', 'vlans': []},
+        snat_type='SRC_TRANS_NONE',
+        snat_pool='',
+        pool=pool,
+        destination={'address': destination, 'port': port},
+        state='STATE_ENABLED',
+        description='',
+        persistence_profiles=[],
+        fallback_persistence_profile='',
+        address=destination,
+
+        # The virtual address may have existed before, and be shared with
+        # other virtual servers, so its state is not known.
+        route_advertisement_state=None
+    )
+    return _VS_STATES[name]
+
+
 def get_rules(api, name):
     return api.LocalLB.VirtualServer.get_rule(
         virtual_servers=[name]
     )[0]
 
 
-def set_rules(api, name, rules_list):
+def set_rules(ops, name, rules_list, current):
     updated = False
     if rules_list is None:
         return False
-    rules_list = list(enumerate(rules_list))
-    try:
-        current_rules = [(x['priority'], x['rule_name']) for x in get_rules(api, name)]
-        to_add_rules = []
-        for i, x in rules_list:
-            if (i, x) not in current_rules:
-                to_add_rules.append({'priority': i, 'rule_name': x})
-        to_del_rules = []
-        for i, x in current_rules:
-            if (i, x) not in rules_list:
-                to_del_rules.append({'priority': i, 'rule_name': x})
-        if len(to_del_rules) > 0:
-            api.LocalLB.VirtualServer.remove_rule(
-                virtual_servers=[name],
-                rules=[to_del_rules]
-            )
-            updated = True
-        if len(to_add_rules) > 0:
-            api.LocalLB.VirtualServer.add_rule(
-                virtual_servers=[name],
-                rules=[to_add_rules]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting rules : %s' % e)
+    desired = set(enumerate(rules_list))
+    current_rules = set((x['priority'], x['rule_name']) for x in current.rules)
+    to_add_rules = [
+        {'priority': i, 'rule_name': x} for i, x in sorted(desired - current_rules)
+    ]
+    to_del_rules = [
+        {'priority': i, 'rule_name': x} for i, x in sorted(current_rules - desired)
+    ]
+    if len(to_del_rules) > 0:
+        ops.append((
+            'LocalLB.VirtualServer.remove_rule',
+            dict(virtual_servers=[name], rules=[to_del_rules]),
+            'rules'
+        ))
+        updated = True
+    if len(to_add_rules) > 0:
+        ops.append((
+            'LocalLB.VirtualServer.add_rule',
+            dict(virtual_servers=[name], rules=[to_add_rules]),
+            'rules'
+        ))
+        updated = True
+    return updated
 
 
 def get_profiles(api, name):
@@ -286,42 +421,46 @@ def get_profiles(api, name):
     )[0]
 
 
-def set_profiles(api, name, profiles_list):
+def set_profiles(ops, name, profiles_list, current):
     updated = False
-
-    try:
-        if profiles_list is None:
-            return False
-        profiles_list = list(profiles_list)
-        current_profiles = list(map(lambda x: x['profile_name'], get_profiles(api, name)))
-        to_add_profiles = []
-        for x in profiles_list:
-            if x not in current_profiles:
-                to_add_profiles.append({'profile_context': 'PROFILE_CONTEXT_TYPE_ALL', 'profile_name': x})
-        to_del_profiles = []
-        for x in current_profiles:
-            if (x not in profiles_list) and (x != "/Common/tcp"):
-                to_del_profiles.append({'profile_context': 'PROFILE_CONTEXT_TYPE_ALL', 'profile_name': x})
-        if len(to_del_profiles) > 0:
-            api.LocalLB.VirtualServer.remove_profile(
-                virtual_servers=[name],
-                profiles=[to_del_profiles]
-            )
-            updated = True
-        if len(to_add_profiles) > 0:
-            api.LocalLB.VirtualServer.add_profile(
-                virtual_servers=[name],
-                profiles=[to_add_profiles]
-            )
-            updated = True
-        current_profiles = [x['profile_name'] for x in get_profiles(api, name)]
-        if len(current_profiles) == 0:
-            raise F5ModuleError(
-                "Virtual servers must has at least one profile"
-            )
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting profiles : %s' % e)
+    if profiles_list is None:
+        return False
+    profiles_list = list(profiles_list)
+    current_profiles = [x['profile_name'] for x in current.profiles]
+    desired = set(profiles_list)
+    existing = set(current_profiles)
+    to_add_profiles = [
+        {'profile_context': PROFILE_CONTEXT_ALL, 'profile_name': x}
+        for x in profiles_list if x not in existing
+    ]
+    to_del_profiles = [
+        {'profile_context': PROFILE_CONTEXT_ALL, 'profile_name': x}
+        for x in current_profiles if x not in desired and x != "/Common/tcp"
+    ]
+
+    # The profiles the virtual server is left with once the changes are made
+    final = existing.difference(x['profile_name'] for x in to_del_profiles)
+    final.update(x['profile_name'] for x in to_add_profiles)
+    if len(final) == 0:
+        raise F5ModuleError(
+            "Virtual servers must has at least one profile"
+        )
+
+    if len(to_del_profiles) > 0:
+        ops.append((
+            'LocalLB.VirtualServer.remove_profile',
+            dict(virtual_servers=[name], profiles=[to_del_profiles]),
+            'profiles'
+        ))
+        updated = True
+    if len(to_add_profiles) > 0:
+        ops.append((
+            'LocalLB.VirtualServer.add_profile',
+            dict(virtual_servers=[name], profiles=[to_add_profiles]),
+            'profiles'
+        ))
+        updated = True
+    return updated
 
 
 def get_policies(api, name):
@@ -330,36 +469,31 @@ def get_policies(api, name):
     )[0]
 
 
-def set_policies(api, name, policies_list):
+def set_policies(ops, name, policies_list, current):
     updated = False
-    try:
-        if policies_list is None:
-            return False
-        policies_list = list(policies_list)
-        current_policies = get_policies(api, name)
-        to_add_policies = []
-        for x in policies_list:
-            if x not in current_policies:
-                to_add_policies.append(x)
-        to_del_policies = []
-        for x in current_policies:
-            if x not in policies_list:
-                to_del_policies.append(x)
-        if len(to_del_policies) > 0:
-            api.LocalLB.VirtualServer.remove_content_policy(
-                virtual_servers=[name],
-                policies=[to_del_policies]
-            )
-            updated = True
-        if len(to_add_policies) > 0:
-            api.LocalLB.VirtualServer.add_content_policy(
-                virtual_servers=[name],
-                policies=[to_add_policies]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting policies : %s' % e)
+    if policies_list is None:
+        return False
+    policies_list = list(policies_list)
+    current_policies = current.policies
+    desired = set(policies_list)
+    existing = set(current_policies)
+    to_add_policies = [x for x in policies_list if x not in existing]
+    to_del_policies = [x for x in current_policies if x not in desired]
+    if len(to_del_policies) > 0:
+        ops.append((
+            'LocalLB.VirtualServer.remove_content_policy',
+            dict(virtual_servers=[name], policies=[to_del_policies]),
+            'policies'
+        ))
+        updated = True
+    if len(to_add_policies) > 0:
+        ops.append((
+            'LocalLB.VirtualServer.add_content_policy',
+            dict(virtual_servers=[name], policies=[to_add_policies]),
+            'policies'
+        ))
+        updated = True
+    return updated
 
 
 def get_vlan(api, name):
@@ -368,78 +502,74 @@ def get_vlan(api, name):
     )[0]
 
 
-def set_enabled_vlans(api, name, vlans_enabled_list):
+def set_enabled_vlans(ops, name, vlans_enabled_list, current):
     updated = False
-    to_add_vlans = []
-    try:
-        if vlans_enabled_list is None:
-            return updated
-        vlans_enabled_list = list(vlans_enabled_list)
-        current_vlans = get_vlan(api, name)
-
-        # Set allowed list back to default ("all")
-        #
-        # This case allows you to undo what you may have previously done.
-        # The default case is "All VLANs and Tunnels". This case will handle
-        # that situation.
-        if 'ALL' in vlans_enabled_list:
-            # The user is coming from a situation where they previously
-            # were specifying a list of allowed VLANs
-            if len(current_vlans['vlans']) > 0 or \
-               current_vlans['state'] is "STATE_ENABLED":
-                api.LocalLB.VirtualServer.set_vlan(
-                    virtual_servers=[name],
-                    vlans=[{'state': 'STATE_DISABLED', 'vlans': []}]
-                )
-                updated = True
-        else:
-            if current_vlans['state'] is "STATE_DISABLED":
-                to_add_vlans = vlans_enabled_list
-            else:
-                for vlan in vlans_enabled_list:
-                    if vlan not in current_vlans['vlans']:
-                        updated = True
-                        to_add_vlans = vlans_enabled_list
-                        break
-            if updated:
-                api.LocalLB.VirtualServer.set_vlan(
-                    virtual_servers=[name],
-                    vlans=[{
-                        'state': 'STATE_ENABLED',
-                        'vlans': [to_add_vlans]
-                    }]
-                )
-
+    if vlans_enabled_list is None:
         return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting enabled vlans : %s' % e)
+    vlans_enabled_list = list(vlans_enabled_list)
+    current_vlans = current.vlan
+
+    # Set allowed list back to default ("all")
+    #
+    # This case allows you to undo what you may have previously done.
+    # The default case is "All VLANs and Tunnels". This case will handle
+    # that situation.
+    if 'ALL' in vlans_enabled_list:
+        # The user is coming from a situation where they previously
+        # were specifying a list of allowed VLANs
+        if len(current_vlans['vlans']) > 0 or \
+           current_vlans['state'] == "STATE_ENABLED":
+            ops.append((
+                'LocalLB.VirtualServer.set_vlan',
+                dict(virtual_servers=[name], vlans=[{'state': 'STATE_DISABLED', 'vlans': []}]),
+                'enabled vlans'
+            ))
+            updated = True
+    else:
+        if current_vlans['state'] == "STATE_DISABLED":
+            # The current list is of the VLANs the virtual server is disabled
+            # on (empty for "all"), so it has to be replaced
+            updated = True
+        elif set(vlans_enabled_list) - set(current_vlans['vlans']):
+            updated = True
+        if updated:
+            ops.append((
+                'LocalLB.VirtualServer.set_vlan',
+                dict(virtual_servers=[name], vlans=[{'state': 'STATE_ENABLED', 'vlans': [vlans_enabled_list]}]),
+                'enabled vlans'
+            ))
+
+    return updated
 
 
-def set_snat(api, name, snat):
+def set_snat(ops, name, snat, current):
     updated = False
-    try:
-        current_state = get_snat_type(api, name)
-        current_snat_pool = get_snat_pool(api, name)
-        if snat is None:
-            return updated
-        elif snat == 'None' and current_state != 'SRC_TRANS_NONE':
-            api.LocalLB.VirtualServer.set_source_address_translation_none(
-                virtual_servers=[name]
-            )
-            updated = True
-        elif snat == 'Automap' and current_state != 'SRC_TRANS_AUTOMAP':
-            api.LocalLB.VirtualServer.set_source_address_translation_automap(
-                virtual_servers=[name]
-            )
-            updated = True
-        elif snat_settings_need_updating(snat, current_state, current_snat_pool):
-            api.LocalLB.VirtualServer.set_source_address_translation_snat_pool(
-                virtual_servers=[name],
-                pools=[snat]
-            )
+    if snat is None:
         return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting snat : %s' % e)
+    current_state = current.snat_type
+    current_snat_pool = current.snat_pool
+    if snat == 'None' and current_state != 'SRC_TRANS_NONE':
+        ops.append((
+            'LocalLB.VirtualServer.set_source_address_translation_none',
+            dict(virtual_servers=[name]),
+            'snat'
+        ))
+        updated = True
+    elif snat == 'Automap' and current_state != 'SRC_TRANS_AUTOMAP':
+        ops.append((
+            'LocalLB.VirtualServer.set_source_address_translation_automap',
+            dict(virtual_servers=[name]),
+            'snat'
+        ))
+        updated = True
+    elif snat_settings_need_updating(snat, current_state, current_snat_pool):
+        ops.append((
+            'LocalLB.VirtualServer.set_source_address_translation_snat_pool',
+            dict(virtual_servers=[name], pools=[snat]),
+            'snat'
+        ))
+        updated = True
+    return updated
 
 
 def get_snat_type(api, name):
@@ -471,19 +601,16 @@ def get_pool(api, name):
     )[0]
 
 
-def set_pool(api, name, pool):
+def set_pool(ops, name, pool, current):
     updated = False
-    try:
-        current_pool = get_pool(api, name)
-        if pool is not None and (pool != current_pool):
-            api.LocalLB.VirtualServer.set_default_pool_name(
-                virtual_servers=[name],
-                default_pools=[pool]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting pool : %s' % e)
+    if pool is not None and (pool != current.pool):
+        ops.append((
+            'LocalLB.VirtualServer.set_default_pool_name',
+            dict(virtual_servers=[name], default_pools=[pool]),
+            'pool'
+        ))
+        updated = True
+    return updated
 
 
 def get_destination(api, name):
@@ -492,34 +619,32 @@ def get_destination(api, name):
     )[0]
 
 
-def set_destination(api, name, destination):
+def set_destination(ops, name, destination, current):
     updated = False
-    try:
-        current_destination = get_destination(api, name)
-        if destination is not None and destination != current_destination['address']:
-            api.LocalLB.VirtualServer.set_destination_v2(
-                virtual_servers=[name],
-                destinations=[{'address': destination, 'port': current_destination['port']}]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting destination : %s' % e)
-
-
-def set_port(api, name, port):
+    current_destination = current.destination
+    if destination is not None and destination != current_destination['address']:
+        ops.append((
+            'LocalLB.VirtualServer.set_destination_v2',
+            dict(virtual_servers=[name], destinations=[{'address': destination, 'port': current_destination['port']}]),
+            'destination'
+        ))
+        # set_port works from the same state, so keep it in sync
+        current.destination = {'address': destination, 'port': current_destination['port']}
+        updated = True
+    return updated
+
+
+def set_port(ops, name, port, current):
     updated = False
-    try:
-        current_destination = get_destination(api, name)
-        if port is not None and port != current_destination['port']:
-            api.LocalLB.VirtualServer.set_destination_v2(
-                virtual_servers=[name],
-                destinations=[{'address': current_destination['address'], 'port': port}]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting port : %s' % e)
+    current_destination = current.destination
+    if port is not None and port != current_destination['port']:
+        ops.append((
+            'LocalLB.VirtualServer.set_destination_v2',
+            dict(virtual_servers=[name], destinations=[{'address': current_destination['address'], 'port': port}]),
+            'port'
+        ))
+        updated = True
+    return updated
 
 
 def get_state(api, name):
@@ -528,22 +653,21 @@ def get_state(api, name):
     )[0]
 
 
-def set_state(api, name, state):
+def set_state(ops, name, state, current):
     updated = False
-    try:
-        current_state = get_state(api, name)
-        # We consider that being present is equivalent to enabled
-        if state == 'present':
-            state = 'enabled'
-        if STATES[state] != current_state:
-            api.LocalLB.VirtualServer.set_enabled_state(
-                virtual_servers=[name],
-                states=[STATES[state]]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting state : %s' % e)
+    current_state = current.state
+    # We consider that being present is equivalent to enabled
+    if state == 'present':
+        state = 'enabled'
+    wanted_state = STATES[state]
+    if wanted_state != current_state:
+        ops.append((
+            'LocalLB.VirtualServer.set_enabled_state',
+            dict(virtual_servers=[name], states=[wanted_state]),
+            'state'
+        ))
+        updated = True
+    return updated
 
 
 def get_description(api, name):
@@ -552,19 +676,16 @@ def get_description(api, name):
     )[0]
 
 
-def set_description(api, name, description):
+def set_description(ops, name, description, current):
     updated = False
-    try:
-        current_description = get_description(api, name)
-        if description is not None and current_description != description:
-            api.LocalLB.VirtualServer.set_description(
-                virtual_servers=[name],
-                descriptions=[description]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting description : %s ' % e)
+    if description is not None and current.description != description:
+        ops.append((
+            'LocalLB.VirtualServer.set_description',
+            dict(virtual_servers=[name], descriptions=[description]),
+            'description'
+        ))
+        updated = True
+    return updated
 
 
 def get_persistence_profiles(api, name):
@@ -573,31 +694,30 @@ def get_persistence_profiles(api, name):
     )[0]
 
 
-def set_default_persistence_profiles(api, name, persistence_profile):
+def set_default_persistence_profiles(ops, name, persistence_profile, current):
     updated = False
     if persistence_profile is None:
         return updated
-    try:
-        current_persistence_profiles = get_persistence_profiles(api, name)
-        default = None
-        for profile in current_persistence_profiles:
-            if profile['default_profile']:
-                default = profile['profile_name']
-                break
-        if default is not None and default != persistence_profile:
-            api.LocalLB.VirtualServer.remove_persistence_profile(
-                virtual_servers=[name],
-                profiles=[[{'profile_name': default, 'default_profile': True}]]
-            )
-        if default != persistence_profile:
-            api.LocalLB.VirtualServer.add_persistence_profile(
-                virtual_servers=[name],
-                profiles=[[{'profile_name': persistence_profile, 'default_profile': True}]]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting default persistence profile : %s' % e)
+    current_persistence_profiles = current.persistence_profiles
+    default = None
+    for profile in current_persistence_profiles:
+        if profile['default_profile']:
+            default = profile['profile_name']
+            break
+    if default is not None and default != persistence_profile:
+        ops.append((
+            'LocalLB.VirtualServer.remove_persistence_profile',
+            dict(virtual_servers=[name], profiles=[[{'profile_name': default, 'default_profile': True}]]),
+            'default persistence profile'
+        ))
+    if default != persistence_profile:
+        ops.append((
+            'LocalLB.VirtualServer.add_persistence_profile',
+            dict(virtual_servers=[name], profiles=[[{'profile_name': persistence_profile, 'default_profile': True}]]),
+            'default persistence profile'
+        ))
+        updated = True
+    return updated
 
 
 def get_fallback_persistence_profile(api, name):
@@ -606,28 +726,27 @@ def get_fallback_persistence_profile(api, name):
     )[0]
 
 
-def set_fallback_persistence_profile(api, partition, name, persistence_profile):
+def set_fallback_persistence_profile(ops, partition, name, persistence_profile, current):
     updated = False
     if persistence_profile is None:
         return updated
-    try:
-        # This is needed because the SOAP API expects this to be an "empty"
-        # value to set the fallback profile to "None". The fq_name function
-        # does not take "None" into account though, so I do that here.
-        if persistence_profile != "":
-            persistence_profile = fq_name(partition, persistence_profile)
-
-        current_fallback_profile = get_fallback_persistence_profile(api, name)
-
-        if current_fallback_profile != persistence_profile:
-            api.LocalLB.VirtualServer.set_fallback_persistence_profile(
-                virtual_servers=[name],
-                profile_names=[persistence_profile]
-            )
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting fallback persistence profile : %s' % e)
+
+    # This is needed because the SOAP API expects this to be an "empty"
+    # value to set the fallback profile to "None". The fq_name function
+    # does not take "None" into account though, so I do that here.
+    if persistence_profile != "":
+        persistence_profile = fq_name(partition, persistence_profile)
+
+    current_fallback_profile = current.fallback_persistence_profile
+
+    if current_fallback_profile != persistence_profile:
+        ops.append((
+            'LocalLB.VirtualServer.set_fallback_persistence_profile',
+            dict(virtual_servers=[name], profile_names=[persistence_profile]),
+            'fallback persistence profile'
+        ))
+        updated = True
+    return updated
 
 
 def get_route_advertisement_status(api, address):
@@ -639,22 +758,289 @@ def get_route_advertisement_status(api, address):
     return result
 
 
-def set_route_advertisement_state(api, destination, partition, route_advertisement_state):
+def set_route_advertisement_state(ops, destination, partition, route_advertisement_state, current):
     updated = False
 
     if route_advertisement_state is None:
         return False
 
+    state = "STATE_%s" % route_advertisement_state.strip().upper()
+    if destination is None:
+        address = current.address
+    else:
+        address = fq_name(partition, destination)
+    if address == current.address:
+        current_route_advertisement_state = current.route_advertisement_state
+    else:
+        # The destination is changing, so the state of the new virtual
+        # address is not known yet.
+        current_route_advertisement_state = None
+    if current_route_advertisement_state != route_advertisement_state:
+        ops.append((
+            'LocalLB.VirtualAddressV2.set_route_advertisement_state',
+            dict(virtual_addresses=[address], states=[state]),
+            'route advertisement state'
+        ))
+        updated = True
+    return updated
+
+
+def read_route_advertisement_state(state):
     try:
-        state = "STATE_%s" % route_advertisement_state.strip().upper()
-        address = fq_name(partition, destination,)
-        current_route_advertisement_state = get_route_advertisement_status(api, address)
-        if current_route_advertisement_state != route_advertisement_state:
-            api.LocalLB.VirtualAddressV2.set_route_advertisement_state(virtual_addresses=[address], states=[state])
-            updated = True
-        return updated
-    except bigsuds.OperationFailed as e:
-        raise Exception('Error on setting profiles : %s' % e)
+        return get_route_advertisement_status(state._api, state.address)
+    except bigsuds.OperationFailed:
+        # The virtual address may not be named after the destination. Leave
+        # the value unknown so that it is set if it was asked for.
+        return None
+
+
+# How VSState reads each setting it was not given
+VS_STATE_READERS = {
+    'rules': lambda state: get_rules(state._api, state._name),
+    'profiles': lambda state: get_profiles(state._api, state._name),
+    'policies': lambda state: get_policies(state._api, state._name),
+    'vlan': lambda state: get_vlan(state._api, state._name),
+    'snat_type': lambda state: get_snat_type(state._api, state._name),
+    'snat_pool': lambda state: get_snat_pool(state._api, state._name),
+    'pool': lambda state: get_pool(state._api, state._name),
+    'state': lambda state: get_state(state._api, state._name),
+    'description': lambda state: get_description(state._api, state._name),
+    'persistence_profiles': lambda state: get_persistence_profiles(state._api, state._name),
+    'fallback_persistence_profile': lambda state: get_fallback_persistence_profile(state._api, state._name),
+    'route_advertisement_state': read_route_advertisement_state,
+}
+
+
+# The set_* functions above only queue their changes as
+# (method, arguments, setting) tuples. They are sent here, in order, so that
+# all of the writes of a run happen together inside one transaction.
+def flush_operations(api, ops):
+    for method, kwargs, setting in ops:
+        func = api
+        for attr in method.split('.'):
+            func = getattr(func, attr)
+        try:
+            func(**kwargs)
+        except bigsuds.OperationFailed as e:
+            raise Exception('Error on setting %s : %s' % (setting, e))
+    del ops[:]
+
+
+def validate_params(params):
+    port = params['port']
+    if port == '' or port is None:
+        params['port'] = None
+        return
+    try:
+        port = int(port)
+    except ValueError:
+        raise F5ModuleError("port must be a number")
+    if not 0 <= port <= 65535:
+        raise F5ModuleError("valid ports must be in range 0 - 65535")
+    params['port'] = port
+
+
+# Brings the virtual server in line with the desired settings, creating it
+# first when current is None. Both cases then go through the same set_*
+# calls; after a create the state is seeded with what vs_create() set, so
+# only the settings that still differ are queued. In check mode nothing is
+# sent.
+def reconcile(api, name, desired, current, check_mode):
+    partition = desired['partition']
+    destination = desired['destination']
+    port = desired['port']
+    changed = False
+
+    if current is None:
+        if (not destination) or (port is None):
+            raise F5ModuleError("both destination and port must be supplied to create a VS")
+        if check_mode:
+            return True
+        action = 'creating'
+    else:
+        action = 'updating'
+
+    try:
+        if current is None:
+            # a bit of a hack to handle concurrent runs of this module.
+            # even though we've checked the virtual_server doesn't exist,
+            # it may exist by the time we run virtual_server().
+            # this catches the exception and does something smart
+            # about it!
+            vs_create(api, name, destination, port, desired['pool'], desired['profiles'])
+            current = created_state(name, fq_name(partition, destination), port, desired['pool'], desired['profiles'])
+            changed = True
+
+        ops = []
+        changed |= set_destination(ops, name, fq_name(partition, destination), current)
+        changed |= set_port(ops, name, port, current)
+        changed |= set_pool(ops, name, desired['pool'], current)
+        changed |= set_description(ops, name, desired['description'], current)
+        changed |= set_snat(ops, name, desired['snat'], current)
+        changed |= set_profiles(ops, name, desired['profiles'], current)
+        changed |= set_policies(ops, name, desired['policies'], current)
+        changed |= set_enabled_vlans(ops, name, desired['enabled_vlans'], current)
+        changed |= set_rules(ops, name, desired['rules'], current)
+        changed |= set_default_persistence_profiles(ops, name, desired['default_persistence_profile'], current)
+        changed |= set_fallback_persistence_profile(ops, partition, name, desired['fallback_persistence_profile'], current)
+        changed |= set_state(ops, name, desired['state'], current)
+        changed |= set_route_advertisement_state(ops, destination, partition, desired['route_advertisement_state'], current)
+
+        if ops and not check_mode:
+            # Have a transaction for all the changes
+            api.System.Session.start_transaction()
+            try:
+                flush_operations(api, ops)
+                api.System.Session.submit_transaction()
+            except Exception:
+                exc_info = sys.exc_info()
+                try:
+                    api.System.Session.rollback_transaction()
+                except bigsuds.OperationFailed:
+                    # The transaction may already be gone, for example when
+                    # submit_transaction failed. The original error matters.
+                    pass
+                reraise(*exc_info)
+            finally:
+                # What was queued is not reflected in the state
+                _VS_STATES.pop(name, None)
+    except Exception as e:
+        raise Exception("Error on %s Virtual Server : %s" % (action, e))
+    return changed
+
+
+def manage_virtual_server(api, params, check_mode):
+    state = params['state']
+    partition = params['partition']
+
+    name = fq_name(partition, params['name'])
+    destination = params['destination']
+    port = params['port']
+
+    enabled_vlans = params['enabled_vlans']
+    if enabled_vlans is None or 'ALL' in enabled_vlans:
+        vlans_to_qualify = None
+    else:
+        vlans_to_qualify = enabled_vlans
+    all_profiles, all_policies, all_rules, all_enabled_vlans = fq_list_names_multi(
+        partition, params['all_profiles'], params['all_policies'],
+        params['all_rules'], vlans_to_qualify
+    )
+    if vlans_to_qualify is None:
+        all_enabled_vlans = enabled_vlans
+
+    pool = fq_name(partition, params['pool'])
+    description = params['description']
+    snat = params['snat']
+    route_advertisement_state = params['route_advertisement_state']
+    default_persistence_profile = fq_name(partition, params['default_persistence_profile'])
+    fallback_persistence_profile = params['fallback_persistence_profile']
+
+    result = {'changed': False}  # default
+
+    if state == 'absent':
+        if not check_mode:
+            if vs_exists(api, name):
+                # hack to handle concurrent runs of module
+                # pool might be gone before we actually remove
+                try:
+                    vs_remove(api, name)
+                    _VS_STATES.pop(name, None)
+                    result = {'changed': True, 'deleted': name}
+                except bigsuds.OperationFailed as e:
+                    if "was not found" in str(e):
+                        result['changed'] = False
+                    else:
+                        raise
+        elif vs_exists(api, name):
+            # check-mode return value
+            result = {'changed': True}
+
+    else:
+        desired = dict(
+            partition=partition,
+            state=state,
+            destination=destination,
+            port=port,
+            pool=pool,
+            profiles=all_profiles,
+            policies=all_policies,
+            rules=all_rules,
+            enabled_vlans=all_enabled_vlans,
+            description=description,
+            snat=snat,
+            default_persistence_profile=default_persistence_profile,
+            fallback_persistence_profile=fallback_persistence_profile,
+            route_advertisement_state=route_advertisement_state
+        )
+        current = get_current_state(api, name)
+        result['changed'] = reconcile(api, name, desired, current, check_mode)
+    return result
+
+
+# Connections of the batch worker threads. Each thread has its own client
+# and its own iControl session, so that their transactions stay apart.
+_worker = threading.local()
+
+
+def connect(connection):
+    return bigip_api(*connection, cachedir=WSDL_CACHE_DIR)
+
+
+def preload_interfaces(api):
+    # bigsuds creates the suds client of an interface, which loads its WSDL,
+    # the first time the interface is used
+    for interface in INTERFACES:
+        namespace, name = interface.split('.')
+        getattr(getattr(api, namespace), name)
+
+
+def worker_api(connection):
+    if getattr(_worker, 'api', None) is None:
+        _worker.api = connect(connection).with_session_id()
+    return _worker.api
+
+
+def manage_virtual_servers(connection, specs, check_mode):
+    def reconcile_one(params):
+        # Each virtual server commits on its own, so one failing must not
+        # hide what was already done to the others
+        try:
+            result = manage_virtual_server(worker_api(connection), params, check_mode)
+        except Exception as e:
+            result = {'changed': False, 'failed': True, 'msg': str(e)}
+        result['name'] = params['name']
+        return result
+
+    workers = min(len(specs), BATCH_WORKERS)
+    pool = ThreadPool(workers)
+    try:
+        results = pool.map(reconcile_one, specs)
+    finally:
+        pool.close()
+        pool.join()
+    return {
+        'changed': any(x['changed'] for x in results),
+        'results': results
+    }
+
+
+def batch_params(module, argument_spec):
+    # Every entry of virtual_servers accepts the same options as the module
+    # itself, and falls back to the module's value for those it leaves out.
+    if not module.params['virtual_servers']:
+        raise F5ModuleError("virtual_servers must list at least one virtual server")
+    result = []
+    for index, spec in enumerate(module.params['virtual_servers'], 1):
+        label = 'virtual server %d of virtual_servers' % index
+        spec = check_list_item(spec, argument_spec, VIRTUAL_SERVER_ARGS, label)
+        if not spec.get('name'):
+            raise F5ModuleError("The %s has no name" % label)
+        params = dict((k, module.params[k]) for k in VIRTUAL_SERVER_ARGS)
+        params.update(spec)
+        validate_params(params)
+        result.append(params)
+    return result
 
 
 def main():
@@ -662,7 +1048,7 @@ def main():
     argument_spec.update(dict(
         state=dict(type='str', default='present',
                    choices=['present', 'absent', 'disabled', 'enabled']),
-        name=dict(type='str', required=True, aliases=['vs']),
+        name=dict(type='str', aliases=['vs']),
         destination=dict(type='str', aliases=['address', 'ip']),
         port=dict(type='str', default=None),
         all_policies=dict(type='list'),
@@ -678,14 +1064,26 @@ def main():
             choices=['enabled', 'disabled']
         ),
         default_persistence_profile=dict(type='str'),
-        fallback_persistence_profile=dict(type='str')
+        fallback_persistence_profile=dict(type='str'),
+        virtual_servers=dict(type='list')
     ))
 
     module = AnsibleModule(
         argument_spec=argument_spec,
-        supports_check_mode=True
+        supports_check_mode=True,
+        required_one_of=[['name', 'virtual_servers']],
+        mutually_exclusive=[['name', 'virtual_servers']]
     )
 
+    try:
+        if module.params['virtual_servers'] is None:
+            validate_params(module.params)
+            specs = None
+        else:
+            specs = batch_params(module, argument_spec)
+    except F5ModuleError as e:
+        module.fail_json(msg=str(e))
+
     if not bigsuds_found:
         module.fail_json(msg="the python bigsuds module is required")
 
@@ -694,121 +1092,33 @@ def main():
         if not hasattr(ssl, 'SSLContext'):
             module.fail_json(msg='bigsuds does not support verifying certificates with python < 2.7.9.  Either update python or set validate_certs=False on the task')
 
-    server = module.params['server']
-    server_port = module.params['server_port']
-    user = module.params['user']
-    password = module.params['password']
-    state = module.params['state']
-    partition = module.params['partition']
-    validate_certs = module.params['validate_certs']
-
-    name = fq_name(partition, module.params['name'])
-    destination = module.params['destination']
-    port = module.params['port']
-    if port == '' or port is None:
-        port = None
-    else:
-        port = int(port)
-    all_profiles = fq_list_names(partition, module.params['all_profiles'])
-    all_policies = fq_list_names(partition, module.params['all_policies'])
-    all_rules = fq_list_names(partition, module.params['all_rules'])
-
-    enabled_vlans = module.params['enabled_vlans']
-    if enabled_vlans is None or 'ALL' in enabled_vlans:
-        all_enabled_vlans = enabled_vlans
-    else:
-        all_enabled_vlans = fq_list_names(partition, enabled_vlans)
-
-    pool = fq_name(partition, module.params['pool'])
-    description = module.params['description']
-    snat = module.params['snat']
-    route_advertisement_state = module.params['route_advertisement_state']
-    default_persistence_profile = fq_name(partition, module.params['default_persistence_profile'])
-    fallback_persistence_profile = module.params['fallback_persistence_profile']
-
-    if 0 > port > 65535:
-        module.fail_json(msg="valid ports must be in range 0 - 65535")
+    connection = (
+        module.params['server'],
+        module.params['user'],
+        module.params['password'],
+        module.params['validate_certs'],
+        module.params['server_port']
+    )
 
     try:
-        api = bigip_api(server, user, password, validate_certs, port=server_port)
-        result = {'changed': False}  # default
-
-        if state == 'absent':
-            if not module.check_mode:
-                if vs_exists(api, name):
-                    # hack to handle concurrent runs of module
-                    # pool might be gone before we actually remove
-                    try:
-                        vs_remove(api, name)
-                        result = {'changed': True, 'deleted': name}
-                    except bigsuds.OperationFailed as e:
-                        if "was not found" in str(e):
-                            result['changed'] = False
-                        else:
-                            raise
-            else:
-                # check-mode return value
-                result = {'changed': True}
-
+        api = connect(connection)
+        if specs is None:
+            result = manage_virtual_server(api, module.params, module.check_mode)
         else:
-            update = False
-            if not vs_exists(api, name):
-                if (not destination) or (port is None):
-                    module.fail_json(msg="both destination and port must be supplied to create a VS")
-                if not module.check_mode:
-                    # a bit of a hack to handle concurrent runs of this module.
-                    # even though we've checked the virtual_server doesn't exist,
-                    # it may exist by the time we run virtual_server().
-                    # this catches the exception and does something smart
-                    # about it!
-                    try:
-                        vs_create(api, name, destination, port, pool, all_profiles)
-                        set_policies(api, name, all_policies)
-                        set_enabled_vlans(api, name, all_enabled_vlans)
-                        set_rules(api, name, all_rules)
-                        set_snat(api, name, snat)
-                        set_description(api, name, description)
-                        set_default_persistence_profiles(api, name, default_persistence_profile)
-                        set_fallback_persistence_profile(api, partition, name, fallback_persistence_profile)
-                        set_state(api, name, state)
-                        set_route_advertisement_state(api, destination, partition, route_advertisement_state)
-                        result = {'changed': True}
-                    except bigsuds.OperationFailed as e:
-                        raise Exception('Error on creating Virtual Server : %s' % e)
-                else:
-                    # check-mode return value
-                    result = {'changed': True}
-            else:
-                update = True
-            if update:
-                # VS exists
-                if not module.check_mode:
-                    # Have a transaction for all the changes
-                    try:
-                        api.System.Session.start_transaction()
-                        result['changed'] |= set_destination(api, name, fq_name(partition, destination))
-                        result['changed'] |= set_port(api, name, port)
-                        result['changed'] |= set_pool(api, name, pool)
-                        result['changed'] |= set_description(api, name, description)
-                        result['changed'] |= set_snat(api, name, snat)
-                        result['changed'] |= set_profiles(api, name, all_profiles)
-                        result['changed'] |= set_policies(api, name, all_policies)
-                        result['changed'] |= set_enabled_vlans(api, name, all_enabled_vlans)
-                        result['changed'] |= set_rules(api, name, all_rules)
-                        result['changed'] |= set_default_persistence_profiles(api, name, default_persistence_profile)
-                        result['changed'] |= set_fallback_persistence_profile(api, partition, name, fallback_persistence_profile)
-                        result['changed'] |= set_state(api, name, state)
-                        result['changed'] |= set_route_advertisement_state(api, destination, partition, route_advertisement_state)
-                        api.System.Session.submit_transaction()
-                    except Exception as e:
-                        raise Exception("Error on updating Virtual Server : %s" % str(e))
-                else:
-                    # check-mode return value
-                    result = {'changed': True}
-
+            # Fill the WSDL cache once, before the workers need it
+            preload_interfaces(api)
+            result = manage_virtual_servers(connection, specs, module.check_mode)
+    except F5ModuleError as e:
+        module.fail_json(msg=str(e))
     except Exception as e:
         module.fail_json(msg="received exception: %s" % e)
 
+    failed = [x for x in result.get('results', []) if x.get('failed')]
+    if failed:
+        module.fail_json(
+            msg="; ".join("%s: %s" % (x['name'], x['msg']) for x in failed),
+            **result
+        )
     module.exit_json(**result)
 
 
@@ -43,8 +43,8 @@ options:
       - offline
   name:
     description:
-      - Specifies the name of the node.
-    required: True
+      - Specifies the name of the node. One of C(name) or C(nodes) is
+        required.
   monitor_type:
     description:
       - Monitor rule type when C(monitors) is specified. When creating a new
@@ -95,11 +95,19 @@ options:
       - Device partition to manage resources on.
     default: Common
     version_added: 2.5
+  nodes:
+    description:
+      - List of nodes to manage in one task, instead of a single C(name).
+        Each item takes the options C(name), C(address), C(fqdn),
+        C(description), C(monitor_type), C(quorum), C(monitors) and
+        C(state), and falls back to the value given to the module for any
+        option it does not set.
+      - The changes to all of the nodes are sent to the BIG-IP in a single
+        transaction.
+      - Mutually exclusive with C(name).
 notes:
   - Requires the f5-sdk Python package on the host. This is as easy as
     pip install f5-sdk
-  - Requires the netaddr Python package on the host. This is as easy as
-    pip install netaddr
 extends_documentation_fragment: f5
 requirements:
   - f5-sdk >= 3.0.2
@@ -163,6 +171,21 @@ EXAMPLES = r'''
     name: 10.20.30.40
   delegate_to: localhost
 
+- name: Add several nodes in one transaction
+  bigip_node:
+    server: lb.mydomain.com
+    user: admin
+    password: secret
+    state: present
+    partition: Common
+    nodes:
+      - name: web1
+        address: 10.20.30.41
+      - name: web2
+        address: 10.20.30.42
+        state: disabled
+  delegate_to: localhost
+
 - name: Add node by their FQDN
   bigip_node:
     server: lb.mydomain.com
@@ -212,32 +235,41 @@ state:
   returned: changed and success
   type: string
   sample: m_of_n
+results:
+  description:
+    - Changed values of each node, when C(nodes) is used.
+  returned: when nodes is used
+  type: list
+  sample: [{"name": "web1", "changed": true, "session": "user-enabled"}]
 '''
 
 import os
-import re
+import random
 import time
 
-try:
-    import netaddr
-    HAS_NETADDR = True
-except ImportError:
-    HAS_NETADDR = False
-
 from ansible.module_utils.f5_utils import AnsibleF5Client
 from ansible.module_utils.f5_utils import AnsibleF5Parameters
 from ansible.module_utils.f5_utils import HAS_F5SDK
 from ansible.module_utils.f5_utils import F5ModuleError
+from ansible.module_utils.f5_utils import check_list_item
 from ansible.module_utils.six import iteritems
-from collections import defaultdict
 
 try:
+    from ansible.module_utils.f5_utils import BigIpTxContext
     from ansible.module_utils.f5_utils import iControlUnexpectedHTTPError
+    from f5.sdk_exception import TransactionSubmitException
 except ImportError:
     HAS_F5SDK = False
 
+# Values of the module's 'state' option that leave a node in place, and the
+# subset of those in which the node is enabled.
+ACTIVE_STATES = frozenset(['present', 'enabled', 'disabled', 'offline'])
+ENABLED_STATES = frozenset(['present', 'enabled'])
+
 
 class Parameters(AnsibleF5Parameters):
+    __slots__ = ()
+
     api_map = {
         'monitor': 'monitors'
     }
@@ -257,6 +289,11 @@ class Parameters(AnsibleF5Parameters):
         'state'
     ]
 
+    # (api attribute, parameter) pairs, worked out once for api_params()
+    api_pairs = tuple(zip(
+        api_attributes, map(api_map.get, api_attributes, api_attributes)
+    ))
+
     returnables = [
         'monitor_type', 'quorum', 'monitors', 'description', 'fqdn', 'session', 'state'
     ]
@@ -266,18 +303,14 @@ class Parameters(AnsibleF5Parameters):
     ]
 
     def __init__(self, params=None):
-        self._values = defaultdict(lambda: None)
-        self._values['__warnings'] = []
+        self._values = {'__warnings': []}
         if params:
             self.update(params=params)
 
     def update(self, params=None):
         if params:
             for k, v in iteritems(params):
-                if self.api_map is not None and k in self.api_map:
-                    map_key = self.api_map[k]
-                else:
-                    map_key = k
+                map_key = self.api_map.get(k, k)
 
                 # Handle weird API parameters like `dns.proxy.__iter__` by
                 # using a map provided by the module developer
@@ -306,12 +339,10 @@ class Parameters(AnsibleF5Parameters):
             return result
 
     def api_params(self):
-        result = {}
-        for api_attribute in self.api_attributes:
-            if self.api_map is not None and api_attribute in self.api_map:
-                result[api_attribute] = getattr(self, self.api_map[api_attribute])
-            else:
-                result[api_attribute] = getattr(self, api_attribute)
+        result = dict(
+            (api_attribute, getattr(self, attr))
+            for api_attribute, attr in self.api_pairs
+        )
         result = self._filter_params(result)
         return result
 
@@ -320,19 +351,37 @@ class Parameters(AnsibleF5Parameters):
             return '/{0}/{1}'.format(self.partition, value)
         return value
 
+    def _parse_monitors(self):
+        # Splits a device monitor string, such as "/Common/icmp and /Common/tcp"
+        # or "min 1 of { /Common/icmp /Common/tcp }", into its monitor names
+        # and m_of_n quorum in one pass. This is read many times while diffing,
+        # so the result is kept along with the value it was parsed from.
+        monitors = self._values.get('monitors')
+        cached = self._values.get('__monitors_parsed')
+        if cached is not None and cached[0] is monitors:
+            return cached[1], cached[2]
+        tokens = monitors.replace('{', ' ').replace('}', ' ').split()
+        names = [x for x in tokens if x.startswith('/')]
+        quorum = None
+        if len(tokens) > 2 and tokens[0] == 'min' and tokens[2] == 'of':
+            if tokens[1].isdigit():
+                quorum = tokens[1]
+        self._values['__monitors_parsed'] = (monitors, names, quorum)
+        return names, quorum
+
     @property
     def monitors_list(self):
-        if self._values['monitors'] is None:
+        if self._values.get('monitors') is None:
             return []
         try:
-            result = re.findall(r'/\w+/[^\s}]+', self._values['monitors'])
+            result, quorum = self._parse_monitors()
             return result
         except Exception:
-            return self._values['monitors']
+            return self._values.get('monitors')
 
     @property
     def monitors(self):
-        if self._values['monitors'] is None:
+        if self._values.get('monitors') is None:
             return None
         monitors = [self._fqdn_name(x) for x in self.monitors_list]
         if self.monitor_type == 'm_of_n':
@@ -346,16 +395,12 @@ class Parameters(AnsibleF5Parameters):
     @property
     def quorum(self):
         if self.kind == 'tm:ltm:pool:poolstate':
-            if self._values['monitors'] is None:
+            monitors = self._values.get('monitors')
+            if monitors is None or not monitors.startswith('min '):
                 return None
-            pattern = r'min\s+(?P<quorum>\d+)\s+of'
-            matches = re.search(pattern, self._values['monitors'])
-            if matches:
-                quorum = matches.group('quorum')
-            else:
-                quorum = None
+            monitors, quorum = self._parse_monitors()
         else:
-            quorum = self._values['quorum']
+            quorum = self._values.get('quorum')
         try:
             if quorum is None:
                 return None
@@ -368,37 +413,42 @@ class Parameters(AnsibleF5Parameters):
     @property
     def monitor_type(self):
         if self.kind == 'tm:ltm:node:nodestate':
-            if self._values['monitors'] is None:
+            monitors = self._values.get('monitors')
+            if monitors is None:
                 return None
-            pattern = r'min\s+\d+\s+of'
-            matches = re.search(pattern, self._values['monitors'])
-            if matches:
+            # Only an m_of_n rule, "min 1 of { ... }", needs to be parsed
+            if not monitors.startswith('min '):
+                return 'and_list'
+            monitors, quorum = self._parse_monitors()
+            if quorum is not None:
                 return 'm_of_n'
             else:
                 return 'and_list'
         else:
-            if self._values['monitor_type'] is None:
+            if self._values.get('monitor_type') is None:
                 return None
-            return self._values['monitor_type']
+            return self._values.get('monitor_type')
 
     @property
     def fqdn(self):
-        if self._values['fqdn'] is None:
+        if self._values.get('fqdn') is None:
             return None
         result = dict(
             addressFamily='ipv4',
             autopopulate='disabled',
             downInterval=3600,
-            tmName=self._values['fqdn']
+            tmName=self._values.get('fqdn')
         )
         return result
 
 
 class Changes(Parameters):
-    pass
+    __slots__ = ()
 
 
 class Difference(object):
+    __slots__ = ('want', 'have')
+
     def __init__(self, want, have=None):
         self.want = want
         self.have = have
@@ -412,11 +462,8 @@ class Difference(object):
 
     def __default(self, param):
         attr1 = getattr(self.want, param)
-        try:
-            attr2 = getattr(self.have, param)
-            if attr1 != attr2:
-                return attr1
-        except AttributeError:
+        attr2 = getattr(self.have, param, None)
+        if attr1 != attr2:
             return attr1
 
     @property
@@ -467,7 +514,7 @@ class Difference(object):
     @property
     def state(self):
         result = None
-        if self.want.state in ['present', 'enabled']:
+        if self.want.state in ENABLED_STATES:
             if self.have.session != 'user-enabled':
                 result = dict(
                     session='user-enabled',
@@ -489,17 +536,20 @@ class Difference(object):
 
 
 class ModuleManager(object):
-    def __init__(self, client):
+    def __init__(self, client, params=None):
         self.client = client
         self.have = None
-        self.want = Parameters(self.client.module.params)
+        if params is None:
+            params = self.client.module.params
+        self.want = Parameters(params)
         self.changes = Changes()
+        self._action = None
+        self._resource = None
+        self._node_api = self.client.api.tm.ltm.nodes.node
 
     def _set_changed_options(self):
-        changed = {}
-        for key in Parameters.returnables:
-            if getattr(self.want, key) is not None:
-                changed[key] = getattr(self.want, key)
+        values = [(k, getattr(self.want, k)) for k in Parameters.returnables]
+        changed = dict((k, v) for k, v in values if v is not None)
         if changed:
             self.changes = Changes(changed)
 
@@ -522,27 +572,25 @@ class ModuleManager(object):
         return False
 
     def _announce_deprecations(self):
-        warnings = []
-        if self.want:
-            warnings += self.want._values.get('__warnings', [])
-        if self.have:
-            warnings += self.have._values.get('__warnings', [])
-        for warning in warnings:
-            self.client.module.deprecate(
-                msg=warning['msg'],
-                version=warning['version']
-            )
+        want_warnings = self.want and self.want._values.get('__warnings')
+        have_warnings = self.have and self.have._values.get('__warnings')
+        if not want_warnings and not have_warnings:
+            return
+        for warnings in (want_warnings, have_warnings):
+            for warning in warnings or []:
+                self.client.module.deprecate(
+                    msg=warning['msg'],
+                    version=warning['version']
+                )
 
     def exec_module(self):
-        changed = False
         result = dict()
-        state = self.want.state
 
         try:
-            if state in ['present', 'enabled', 'disabled', 'offline']:
-                changed = self.present()
-            elif state == "absent":
-                changed = self.absent()
+            changed = self.plan()
+            if changed and not self.client.check_mode:
+                self.apply()
+                self.settle()
         except IOError as e:
             raise F5ModuleError(str(e))
 
@@ -552,8 +600,114 @@ class ModuleManager(object):
         self._announce_deprecations()
         return result
 
+    def exec_bulk(self, nodes):
+        # Every node is read and compared first. The writes for all of them
+        # are then sent in one transaction, which BIG-IP commits as a whole.
+        managers = [
+            ModuleManager(self.client, params) for params in self._bulk_params(nodes)
+        ]
+
+        try:
+            changed = [manager.plan() for manager in managers]
+            pending = [m for m, c in zip(managers, changed) if c]
+            if pending and not self.client.check_mode:
+                self._apply_in_transaction(pending)
+                for manager in pending:
+                    manager.settle(reload=True)
+        except IOError as e:
+            raise F5ModuleError(str(e))
+
+        results = []
+        for manager, node_changed in zip(managers, changed):
+            result = manager.changes.to_return()
+            result.update(dict(name=manager.want.name, changed=node_changed))
+            results.append(result)
+            manager._announce_deprecations()
+        return dict(changed=any(changed), results=results)
+
+    def _apply_in_transaction(self, managers):
+        # Nothing is applied unless BIG-IP validates and commits the whole
+        # transaction, so a failure here leaves every node as it was.
+        tx = self.client.api.tm.transactions.transaction
+        opened = False
+        failing = None
+        try:
+            with BigIpTxContext(tx):
+                opened = True
+                for failing in managers:
+                    failing.apply()
+                failing = None
+        except (iControlUnexpectedHTTPError, TransactionSubmitException) as e:
+            if not opened:
+                where = "opening the transaction"
+            elif failing is None:
+                where = "committing the transaction"
+            else:
+                where = "queuing the changes to node {0}".format(failing.want.name)
+            raise F5ModuleError(
+                "The node transaction was rolled back after an error while {0}: {1}".format(where, str(e))
+            )
+
+    def _bulk_params(self, nodes):
+        # Each item of 'nodes' takes the per-node options of the module, and
+        # falls back to the module's value for any it leaves out.
+        if not nodes:
+            raise F5ModuleError("The 'nodes' parameter must list at least one node")
+        result = []
+        for index, node in enumerate(nodes, 1):
+            label = 'node {0} of nodes'.format(index)
+            node = check_list_item(node, ARGUMENT_SPEC, NODE_OPTIONS, label)
+            if not node.get('name'):
+                raise F5ModuleError("The {0} has no name".format(label))
+            params = dict(self.client.module.params)
+            params.pop('nodes')
+            params.update(node)
+            result.append(params)
+        return result
+
+    def plan(self):
+        state = self.want.state
+        if state in ACTIVE_STATES:
+            return self.present()
+        elif state == "absent":
+            return self.absent()
+        return False
+
+    def apply(self):
+        if self._action == 'create':
+            self.create_on_device()
+        elif self._action == 'update':
+            self.update_on_device()
+            # When the state itself changed, the update has already sent the
+            # offline session and state, so there is no need to send them twice.
+            if self.want.state == 'offline' and self.changes.state != 'user-down':
+                self.update_node_offline_on_device()
+        elif self._action == 'remove':
+            self.remove_from_device()
+
+    def settle(self, reload=False):
+        # Follow-up work that can only happen once the writes from apply()
+        # have taken effect on the device.
+        if self._action == 'create':
+            if self.want.fqdn is None and not self.want.is_offline:
+                return
+            if reload:
+                # Inside a transaction, create only returns the queued command
+                self.load_from_device()
+            # Only nodes created by FQDN go through FQDN checks
+            if self.want.fqdn is not None:
+                self._wait_for_fqdn_checks(self._resource)
+            # It appears that you cannot create a node in an 'offline' state, so instead
+            # we update its status to offline after we create it.
+            if self.want.is_offline:
+                self.update_node_offline_on_device()
+        elif self._action == 'remove':
+            if self.exists():
+                raise F5ModuleError("Failed to delete the node.")
+
     def present(self):
-        if self.exists():
+        self.have = self.read_current_from_device()
+        if self.have:
             return self.update()
         else:
             return self.create()
@@ -576,12 +730,12 @@ class ModuleManager(object):
         # The 'state' must be set to None to exclude the values (accepted by this
         # module) from being sent to the BIG-IP because for specific Ansible states,
         # BIG-IP will consider those state values invalid.
-        if self.want.state in ['present', 'enabled']:
+        if self.want.state in ENABLED_STATES:
             self.want.update(dict(
                 session='user-enabled',
                 state='user-up',
             ))
-        elif self.want.state in 'disabled':
+        elif self.want.state == 'disabled':
             self.want.update(dict(
                 session='user-disabled',
                 state='user-up'
@@ -606,15 +760,7 @@ class ModuleManager(object):
         self._check_required_creation_vars()
         self._munge_creation_state_for_device()
         self._set_changed_options()
-        if self.client.check_mode:
-            return True
-        self.create_on_device()
-        if not self.exists():
-            raise F5ModuleError("Failed to create the node")
-        # It appears that you cannot create a node in an 'offline' state, so instead
-        # we update its status to offline after we create it.
-        if self.want.is_offline:
-            self.update_node_offline_on_device()
+        self._action = 'create'
         return True
 
     def should_update(self):
@@ -624,39 +770,43 @@ class ModuleManager(object):
         return False
 
     def update(self):
-        self.have = self.read_current_from_device()
         if not self.should_update():
             return False
-        if self.client.check_mode:
-            return True
-        self.update_on_device()
-        if self.want.state == 'offline':
-            self.update_node_offline_on_device()
+        self._action = 'update'
         return True
 
     def absent(self):
-        if self.exists():
+        if self.load_from_device():
             return self.remove()
         return False
 
     def remove(self):
-        if self.client.check_mode:
-            return True
-        self.remove_from_device()
-        if self.exists():
-            raise F5ModuleError("Failed to delete the node.")
+        self._action = 'remove'
         return True
 
+    def load_from_device(self):
+        # A single load doubles as the existence check; the resource is kept
+        # so later writes do not have to fetch it again.
+        try:
+            self._resource = self._node_api.load(
+                name=self.want.name,
+                partition=self.want.partition
+            )
+        except iControlUnexpectedHTTPError as e:
+            if e.response.status_code != 404:
+                raise
+            self._resource = None
+        return self._resource
+
     def read_current_from_device(self):
-        resource = self.client.api.tm.ltm.nodes.node.load(
-            name=self.want.name,
-            partition=self.want.partition
-        )
+        resource = self.load_from_device()
+        if resource is None:
+            return None
         result = resource.attrs
         return Parameters(result)
 
     def exists(self):
-        result = self.client.api.tm.ltm.nodes.node.exists(
+        result = self._node_api.exists(
             name=self.want.name,
             partition=self.want.partition
         )
@@ -667,90 +817,91 @@ class ModuleManager(object):
             session="user-disabled",
             state="user-down"
         )
-        result = self.client.api.tm.ltm.nodes.node.load(
-            name=self.want.name,
-            partition=self.want.partition
-        )
-        result.modify(**params)
+        if self._resource is None:
+            self.load_from_device()
+        self._resource.modify(**params)
 
     def update_on_device(self):
         params = self.changes.api_params()
-        result = self.client.api.tm.ltm.nodes.node.load(
-            name=self.want.name,
-            partition=self.want.partition
-        )
-        result.modify(**params)
+        self._resource.modify(**params)
 
     def create_on_device(self):
+        # The created resource is kept so that follow-up changes, like
+        # taking the node offline, do not need to load it again.
         params = self.want.api_params()
-        resource = self.client.api.tm.ltm.nodes.node.create(
+        self._resource = self._node_api.create(
             name=self.want.name,
             partition=self.want.partition,
             **params
         )
-        self._wait_for_fqdn_checks(resource)
+        return self._resource
 
     def _wait_for_fqdn_checks(self, resource):
-        while True:
-            if resource.state == 'fqdn-checking':
-                resource.refresh()
-                time.sleep(1)
-            else:
-                break
+        # The check usually finishes quickly, so poll often at first and back
+        # off (with some jitter) the longer it takes.
+        delay = 0.05
+        deadline = time.time() + 60
+        while resource.state == 'fqdn-checking':
+            if time.time() > deadline:
+                raise F5ModuleError("Timed out waiting for FQDN checks")
+            time.sleep(delay * random.uniform(0.9, 1.1))
+            delay = min(delay * 2, 1.5)
+            resource.refresh()
 
     def remove_from_device(self):
-        result = self.client.api.tm.ltm.nodes.node.load(
-            name=self.want.name,
-            partition=self.want.partition
-        )
-        if result:
-            result.delete()
-
-
-class ArgumentSpec(object):
-    def __init__(self):
-        self.supports_check_mode = True
-        self.argument_spec = dict(
-            name=dict(required=True),
-            address=dict(
-                aliases=['host', 'ip']
-            ),
-            fqdn=dict(
-                aliases=['hostname']
-            ),
-            description=dict(),
-            monitor_type=dict(
-                choices=[
-                    'and_list', 'm_of_n', 'single'
-                ]
-            ),
-            quorum=dict(type='int'),
-            monitors=dict(type='list'),
-            state=dict(
-                choices=['absent', 'present', 'enabled', 'disabled', 'offline'],
-                default='present'
-            )
-        )
-        self.f5_product_name = 'bigip'
+        if self._resource:
+            self._resource.delete()
+
+
+ARGUMENT_SPEC = dict(
+    name=dict(),
+    address=dict(
+        aliases=['host', 'ip']
+    ),
+    fqdn=dict(
+        aliases=['hostname']
+    ),
+    description=dict(),
+    monitor_type=dict(
+        choices=[
+            'and_list', 'm_of_n', 'single'
+        ]
+    ),
+    quorum=dict(type='int'),
+    monitors=dict(type='list'),
+    state=dict(
+        choices=['absent', 'present', 'enabled', 'disabled', 'offline'],
+        default='present'
+    ),
+    nodes=dict(type='list')
+)
+SUPPORTS_CHECK_MODE = True
+F5_PRODUCT_NAME = 'bigip'
+
+# The options each item of 'nodes' may set
+NODE_OPTIONS = (
+    'name', 'address', 'fqdn', 'description', 'monitor_type', 'quorum',
+    'monitors', 'state'
+)
 
 
 def main():
-    spec = ArgumentSpec()
-
     client = AnsibleF5Client(
-        argument_spec=spec.argument_spec,
-        supports_check_mode=spec.supports_check_mode,
-        f5_product_name=spec.f5_product_name
+        argument_spec=ARGUMENT_SPEC,
+        supports_check_mode=SUPPORTS_CHECK_MODE,
+        f5_product_name=F5_PRODUCT_NAME,
+        required_one_of=[['name', 'nodes']],
+        mutually_exclusive=[['name', 'nodes']]
     )
     try:
         if not HAS_F5SDK:
             raise F5ModuleError("The python f5-sdk module is required")
 
-        if not HAS_NETADDR:
-            raise F5ModuleError("The python netaddr module is required")
-
         mm = ModuleManager(client)
-        results = mm.exec_module()
+        if client.module.params['nodes'] is not None:
+            results = mm.exec_bulk(client.module.params['nodes'])
+        else:
+            results = mm.exec_module()
         client.module.exit_json(**results)
     except F5ModuleError as e:
         client.module.fail_json(msg=str(e))
@@ -93,12 +93,16 @@ def f5_parse_arguments(module):
     )
 
 
-def bigip_api(bigip, user, password, validate_certs, port=443):
+def bigip_api(bigip, user, password, validate_certs, port=443, cachedir=None):
+    # When cachedir is given, suds keeps the parsed WSDLs there (for a day)
+    # instead of downloading them for every new client.
     try:
         if bigsuds.__version__ >= '1.0.4':
-            api = bigsuds.BIGIP(hostname=bigip, username=user, password=password, verify=validate_certs, port=port)
+            api = bigsuds.BIGIP(hostname=bigip, username=user, password=password, verify=validate_certs, port=port,
+                                cachedir=cachedir)
         elif bigsuds.__version__ == '1.0.3':
-            api = bigsuds.BIGIP(hostname=bigip, username=user, password=password, verify=validate_certs)
+            api = bigsuds.BIGIP(hostname=bigip, username=user, password=password, verify=validate_certs,
+                                cachedir=cachedir)
         else:
             api = bigsuds.BIGIP(hostname=bigip, username=user, password=password)
     except TypeError:
@@ -134,6 +138,15 @@ def fq_list_names(partition, list_names):
     return map(lambda x: fq_name(partition, x), list_names)
 
 
+# Fully Qualified names (with partition) for several lists at once
+def fq_list_names_multi(partition, *lists):
+    prefix = '/%s/' % partition
+    return [
+        None if names is None else [x if x.startswith('/') else prefix + x for x in names]
+        for names in lists
+    ]
+
+
 # New style
 
 from abc import ABCMeta, abstractproperty
@@ -153,7 +166,7 @@ except ImportError:
 
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.six import iteritems, with_metaclass
+from ansible.module_utils.six import iteritems, string_types, with_metaclass
 
 
 F5_COMMON_ARGS = dict(
@@ -299,6 +312,8 @@ class AnsibleF5Client(object):
 
 
 class AnsibleF5Parameters(object):
+    __slots__ = ('_values',)
+
     def __init__(self, params=None):
         self._values = defaultdict(lambda: None)
         if params:
@@ -328,11 +343,11 @@ class AnsibleF5Parameters(object):
     def __getattr__(self, item):
         # Ensures that properties that weren't defined, and therefore stashed
         # in the `_values` dict, will be retrievable.
-        return self._values[item]
+        return self._values.get(item)
 
     @property
     def partition(self):
-        if self._values['partition'] is None:
+        if self._values.get('partition') is None:
             return 'Common'
         return self._values['partition'].strip('/')
 
@@ -347,3 +362,68 @@ class AnsibleF5Parameters(object):
 class F5ModuleError(Exception):
     pass
 
+
+# Items of an option that is a list of dictionaries (such as the virtual
+# servers of bigip_virtual_server) do not go through AnsibleModule's argument
+# handling. This gives each item the same alias, type and choices handling
+# that the options in `argument_spec` get when passed to the module directly.
+def check_list_item(item, argument_spec, options, label):
+    if not isinstance(item, dict):
+        raise F5ModuleError("The %s must be a dictionary" % label)
+
+    aliases = {}
+    for option in options:
+        for alias in argument_spec[option].get('aliases') or []:
+            aliases[alias] = option
+
+    result = {}
+    for key, value in iteritems(item):
+        option = aliases.get(key, key)
+        if option not in options:
+            raise F5ModuleError("Unsupported parameter for the %s: %s" % (label, key))
+        if option in result:
+            raise F5ModuleError(
+                "Only one of '%s' or its aliases can be set for the %s" % (option, label)
+            )
+        result[option] = value
+
+    for option, value in iteritems(result):
+        if value is None:
+            continue
+        spec = argument_spec[option]
+        value = _convert_list_item_value(value, spec.get('type', 'str'), option, label)
+        choices = spec.get('choices')
+        if choices and value not in choices:
+            raise F5ModuleError(
+                "The '%s' of the %s must be one of: %s" % (option, label, ', '.join(choices))
+            )
+        result[option] = value
+    return result
+
+
+def _convert_list_item_value(value, type, option, label):
+    if type == 'str':
+        if isinstance(value, string_types):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+    elif type == 'list':
+        if isinstance(value, list):
+            return value
+        if isinstance(value, string_types):
+            return [x.strip() for x in value.split(',')]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return [str(value)]
+    elif type == 'int':
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, string_types):
+            try:
+                return int(value)
+            except ValueError:
+                pass
+    else:
+        return value
+    raise F5ModuleError(
+        "The '%s' of the %s must be of type %s" % (option, label, type)
+    )